@@ -3,10 +3,21 @@ import logging
 from pathlib import Path
 import base64
 from html import escape as html_escape
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import pytest
 from utils.driver_factory import create_driver
+from utils.scheduling import (
+    DURATIONS_CACHE_KEY,
+    FAILED_CACHE_KEY,
+    FIXED_OVERHEAD_S,
+    estimate_scenario_duration,
+    load_durations_file,
+    order_by_priority,
+    parse_shard,
+    partition_shards,
+    valid_durations,
+)
 
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
@@ -14,6 +25,14 @@ from selenium.common.exceptions import NoSuchElementException
 
 _LOG_CONFIGURED = False
 
+# Estado de planificación por sesión (en `config.stash` para no filtrarse entre corridas in-process).
+_SHARD_KEY = pytest.StashKey[Optional[Tuple[int, int]]]()
+_SHARD_DURATIONS_KEY = pytest.StashKey[Dict[str, float]]()
+_EMPTY_SHARD_KEY = pytest.StashKey[bool]()
+# Duración acumulada (setup + call + teardown) y resultado de cada test en esta corrida.
+_RUN_DURATIONS_KEY = pytest.StashKey[Dict[str, float]]()
+_RUN_OUTCOMES_KEY = pytest.StashKey[Dict[str, str]]()
+
 
 def _setup_logging() -> None:
     # Idempotente: evita reconfigurar el root logger varias veces durante la sesión de pytest.
@@ -68,12 +87,129 @@ def pytest_addoption(parser):
         action="store_true",
         help="Adjunta screenshot incluso si el test pasa (para ver evidencia en éxitos)",
     )
+    parser.addoption(
+        "--shard",
+        default=None,
+        metavar="i/N",
+        help="Ejecuta solo el shard i de N (1-based), balanceado por duración estimada o --durations-file",
+    )
+    parser.addoption(
+        "--durations-file",
+        default=None,
+        metavar="PATH",
+        help="JSON {nodeid: segundos} compartido por todas las máquinas para calcular los shards",
+    )
 
 
 def pytest_configure(config):
     _setup_logging()
     logging.getLogger(__name__).info("Pytest configurado. Logging inicializado.")
 
+    try:
+        config.stash[_SHARD_KEY] = parse_shard(config.getoption("--shard"))
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+
+    durations_file = config.getoption("--durations-file")
+    try:
+        config.stash[_SHARD_DURATIONS_KEY] = load_durations_file(durations_file) if durations_file else {}
+    except (OSError, ValueError) as e:
+        raise pytest.UsageError(f"--durations-file inválido: {e}")
+    config.stash[_RUN_DURATIONS_KEY] = {}
+    config.stash[_RUN_OUTCOMES_KEY] = {}
+
+
+# --- Planificación por duraciones históricas (orden y sharding) ---
+
+def _estimated_durations(items) -> dict:
+    # Estimación determinística a partir del JSON indicado con @pytest.mark.resource(...):
+    # depende solo del repo, así que todas las máquinas de CI obtienen los mismos valores.
+    estimated = {}
+    for item in items:
+        marker = item.get_closest_marker("resource")
+        estimated[item.nodeid] = estimate_scenario_duration(marker.args[0]) if marker and marker.args else FIXED_OVERHEAD_S
+    return estimated
+
+
+def _cached_durations(config) -> dict:
+    cache = getattr(config, "cache", None)
+    return valid_durations(cache.get(DURATIONS_CACHE_KEY, {})) if cache is not None else {}
+
+
+def _previous_failures(config) -> list:
+    cache = getattr(config, "cache", None)
+    failed = cache.get(FAILED_CACHE_KEY, []) if cache is not None else []
+    return [nid for nid in failed if isinstance(nid, str)] if isinstance(failed, list) else []
+
+
+# trylast: debe ver la selección final, después de que `-m`/`-k` deseleccionen tests;
+# si no, el shard se calcula sobre tests que luego se descartan y queda desbalanceado o vacío.
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    logger = logging.getLogger(__name__)
+    estimated = _estimated_durations(items)
+
+    shard = config.stash[_SHARD_KEY]
+    if shard and items:
+        index, total = shard
+        # La partición nunca usa el cache local: cada máquina solo mide su propio shard y los
+        # caches divergen, lo que haría que un test se saltee o corra dos veces. Se usa el archivo
+        # compartido de `--durations-file` (si se pasó) o la estimación por notas.
+        shard_durations = {**estimated, **config.stash[_SHARD_DURATIONS_KEY]}
+        selected = set(partition_shards([i.nodeid for i in items], shard_durations, total)[index - 1])
+        deselected = [i for i in items if i.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [i for i in items if i.nodeid in selected]
+        if not items:
+            # Más shards que tests seleccionados: no es un error, el job de CI debe terminar en verde.
+            logger.warning(f"Shard {index}/{total} vacío: no hay tests asignados a este shard")
+            config.stash[_EMPTY_SHARD_KEY] = True
+
+    # Dentro del shard sí se usa el historial local: fallidos previos primero y luego el más largo.
+    expected = {**estimated, **_cached_durations(config)}
+    by_id = {i.nodeid: i for i in items}
+    items[:] = [by_id[nid] for nid in order_by_priority(list(by_id), expected, _previous_failures(config))]
+    logger.info("Orden de ejecución: " + ", ".join(f"{i.nodeid} (~{expected[i.nodeid]:.0f}s)" for i in items))
+
+
+def _record_run(config, report) -> None:
+    # Se llama una vez por fase; sumamos las tres para medir el costo real del test (incluye driver).
+    # Solo se persiste si la fase "call" pasó (ver `pytest_sessionfinish`).
+    if report.skipped:
+        return
+    durations = config.stash[_RUN_DURATIONS_KEY]
+    outcomes = config.stash[_RUN_OUTCOMES_KEY]
+    durations[report.nodeid] = durations.get(report.nodeid, 0.0) + report.duration
+    if report.failed:
+        outcomes[report.nodeid] = "failed"
+    elif report.when == "call":
+        outcomes.setdefault(report.nodeid, "passed")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if config.stash.get(_EMPTY_SHARD_KEY, False) and exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+        session.exitstatus = pytest.ExitCode.OK
+
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return
+    run_durations = config.stash[_RUN_DURATIONS_KEY]
+    run_outcomes = config.stash[_RUN_OUTCOMES_KEY]
+    # Solo los tests que corrieron completos actualizan su duración: un fallo temprano o un skip
+    # medirían casi 0s y subestimarían justo a los tests que la próxima corrida pone primero.
+    durations = _cached_durations(config)
+    durations.update({
+        nid: round(d, 2) for nid, d in run_durations.items() if run_outcomes.get(nid) == "passed"
+    })
+    cache.set(DURATIONS_CACHE_KEY, durations)
+
+    # Los tests que no corrieron en esta sesión conservan su estado previo.
+    failed = {nid for nid in _previous_failures(config) if nid not in run_outcomes}
+    failed |= {nid for nid, outcome in run_outcomes.items() if outcome == "failed"}
+    cache.set(FAILED_CACHE_KEY, sorted(failed))
+
 
 def _reports_dir() -> Path:
     return Path(__file__).resolve().parent / "reports"
@@ -201,6 +337,7 @@ def pytest_runtest_makereport(item, call):
     # Ejecuta el resto de hooks y obtiene el reporte
     outcome = yield
     report = outcome.get_result()
+    _record_run(item.config, report)
 
     html_plugin = item.config.pluginmanager.getplugin("html")
     if not html_plugin:
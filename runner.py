@@ -15,6 +15,10 @@ HEADLESS = True
 # Opcional: si querés siempre adjuntar screenshot aunque el test pase
 ALWAYS_SCREENSHOT = False
 
+# Opcional: ejecutar solo una porción de la suite, p. ej. "1/3" en la primera de tres máquinas de CI.
+# Los shards se balancean con la duración estimada por notas, igual en todas las máquinas (None -> toda la selección).
+SHARD: str | None = None
+
 
 def _to_marker_expr(sel: str | None) -> str | None:
     # Traduce entradas amigables (números, "scenarioN", listas separadas por coma)
@@ -77,6 +81,9 @@ def main() -> int:
     if ALWAYS_SCREENSHOT:
         pytest_args.append("--always-screenshot")
 
+    if SHARD:
+        pytest_args += ["--shard", SHARD]
+
     return pytest.main(pytest_args)
 
 
@@ -6,8 +6,12 @@ from utils.test_data import load_json_from_resources
 
 logger = logging.getLogger(__name__)
 
+# Único origen del archivo de datos: lo usan el marker (estimación de duración) y la carga del test.
+SCENARIO_FILE = "test_scenario_2.json"
+
 @pytest.mark.e2e
 @pytest.mark.scenario2
+@pytest.mark.resource(SCENARIO_FILE)
 def test_play_scenario_2(driver):
     logger.info("[Escenario 2] Inicio")
     piano = PianoPage(driver)
@@ -15,7 +19,7 @@ def test_play_scenario_2(driver):
     piano.assert_piano_url()
 
     logger.info("[Escenario 2] Cargando datos del escenario")
-    data = load_json_from_resources("test_scenario_2.json")
+    data = load_json_from_resources(SCENARIO_FILE)
 
     scenario = data.get("scenario", {})
     notes = scenario.get("notes", [])
@@ -6,9 +6,13 @@ from pages.piano_page import PianoPage
 
 logger = logging.getLogger(__name__)
 
+# Único origen del archivo de datos: lo usan el marker (estimación de duración) y la carga del test.
+SCENARIO_FILE = "test_scenario_3.json"
+
 
 @pytest.mark.e2e
 @pytest.mark.scenario3
+@pytest.mark.resource(SCENARIO_FILE)
 def test_play_scenario_3(driver):
     logger.info("[Escenario 3] Inicio")
     piano = PianoPage(driver)
@@ -16,7 +20,7 @@ def test_play_scenario_3(driver):
     piano.assert_piano_url()
 
     logger.info("[Escenario 3] Cargando datos del escenario")
-    data = load_json_from_resources("test_scenario_3.json")
+    data = load_json_from_resources(SCENARIO_FILE)
 
     scenario = data.get("scenario", {})
     notes = scenario.get("notes", [])
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from utils.scheduling import (
+    FIXED_OVERHEAD_S,
+    PER_NOTE_OVERHEAD_S,
+    estimate_scenario_duration,
+    order_by_priority,
+    parse_shard,
+    partition_shards,
+    valid_durations,
+)
+
+pytest_plugins = ["pytester"]
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_parse_shard_valid():
+    assert parse_shard("1/2") == (1, 2)
+    assert parse_shard(" 3 / 3 ") == (3, 3)
+    assert parse_shard(None) is None
+    assert parse_shard("") is None
+
+
+@pytest.mark.parametrize("value", ["0/2", "3/2", "a/b", "1/0"])
+def test_parse_shard_invalid(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_estimate_from_notes_and_delay():
+    # Escenario 3: 46 notas con el delay por defecto (1s).
+    assert estimate_scenario_duration("test_scenario_3.json") == pytest.approx(
+        FIXED_OVERHEAD_S + 46 * (1 + PER_NOTE_OVERHEAD_S)
+    )
+
+
+def test_estimate_falls_back_on_missing_or_invalid_resource():
+    assert estimate_scenario_duration("no_existe.json") == FIXED_OVERHEAD_S
+    # notes_map.json existe pero no tiene la forma de un escenario.
+    assert estimate_scenario_duration("notes_map.json") == FIXED_OVERHEAD_S
+
+
+def test_previous_failures_run_first_then_longest():
+    durations = {"a": 10.0, "b": 50.0, "c": 30.0}
+    assert order_by_priority(["a", "b", "c"], durations, failed=["a"]) == ["a", "b", "c"]
+    assert order_by_priority(["a", "b", "c"], durations, failed=[]) == ["b", "c", "a"]
+
+
+def test_partition_balances_longest_first():
+    durations = {"s1": 44.5, "s2": 79.0, "s3": 115.8}
+    assert partition_shards(["s1", "s2", "s3"], durations, 2) == [["s3"], ["s1", "s2"]]
+
+
+def test_partition_ties_are_stable():
+    # Mismas duraciones: desempata el orden de colección y luego el índice de shard más bajo.
+    durations = {"a": 5.0, "b": 5.0, "c": 5.0, "d": 5.0}
+    assert partition_shards(["a", "b", "c", "d"], durations, 2) == [["a", "c"], ["b", "d"]]
+    assert partition_shards(["a", "b", "c", "d"], durations, 2) == partition_shards(["a", "b", "c", "d"], durations, 2)
+
+
+def test_valid_durations_drops_malformed_entries():
+    raw = {"a": 12.5, "b": "x", "c": None, "d": -1, "e": float("nan"), "f": True, "g": 3}
+    assert valid_durations(raw) == {"a": 12.5, "g": 3.0}
+    assert valid_durations(["a", 1]) == {}
+
+
+SUITE = {"test_scenarios.py::test_s1", "test_scenarios.py::test_s2", "test_scenarios.py::test_s3"}
+
+
+def _make_suite(pytester, monkeypatch):
+    # El conftest real en un directorio temporal, con un test por escenario y su JSON de `resources/`.
+    monkeypatch.setenv("PYTHONPATH", str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    pytester.makeconftest((ROOT / "conftest.py").read_text(encoding="utf-8"))
+    pytester.makeini((ROOT / "pytest.ini").read_text(encoding="utf-8").replace("addopts", "# addopts"))
+    pytester.makepyfile(test_scenarios="""
+        import pytest
+
+        @pytest.mark.scenario1
+        @pytest.mark.resource("test_scenarios_1.json")
+        def test_s1(): pass
+
+        @pytest.mark.scenario2
+        @pytest.mark.resource("test_scenario_2.json")
+        def test_s2(): pass
+
+        @pytest.mark.scenario3
+        @pytest.mark.resource("test_scenario_3.json")
+        def test_s3(): pass
+    """)
+
+
+def _collected(result) -> set:
+    return {line for line in result.outlines if re.fullmatch(r"\S+\.py::\S+", line)}
+
+
+def test_shard_applies_after_marker_selection(pytester, monkeypatch):
+    _make_suite(pytester, monkeypatch)
+    shards = []
+    for index in (1, 2):
+        result = pytester.runpytest_subprocess(
+            "--collect-only", "-q", "-p", "no:cacheprovider", "-m", "scenario1 or scenario2", "--shard", f"{index}/2"
+        )
+        shards.append(_collected(result))
+
+    assert all(shards)
+    assert not shards[0] & shards[1]
+    assert shards[0] | shards[1] == {"test_scenarios.py::test_s1", "test_scenarios.py::test_s2"}
+
+
+def test_shards_ignore_divergent_local_caches(pytester, monkeypatch):
+    # Cada máquina de CI solo midió su propio shard: los caches difieren, la partición no debe.
+    _make_suite(pytester, monkeypatch)
+    caches = {
+        1: {"test_scenarios.py::test_s3": 120.0},
+        2: {"test_scenarios.py::test_s1": 40.0, "test_scenarios.py::test_s2": 130.0},
+    }
+    shards = []
+    for index, cached in caches.items():
+        pytester.makefile("", **{".pytest_cache/v/e2e/durations": json.dumps(cached)})
+        shards.append(_collected(pytester.runpytest_subprocess("--collect-only", "-q", "--shard", f"{index}/2")))
+
+    assert not shards[0] & shards[1]
+    assert shards[0] | shards[1] == SUITE
+
+
+def test_durations_file_drives_partition(pytester, monkeypatch):
+    _make_suite(pytester, monkeypatch)
+    pytester.makefile(".json", durations=json.dumps({"test_scenarios.py::test_s1": 500.0}))
+    result = pytester.runpytest_subprocess(
+        "--collect-only", "-q", "-p", "no:cacheprovider", "--durations-file", "durations.json", "--shard", "1/2"
+    )
+    assert _collected(result) == {"test_scenarios.py::test_s1"}
+
+
+def test_empty_shard_exits_ok(pytester, monkeypatch):
+    # Más shards que tests seleccionados: el shard vacío no debe fallar el job de CI (exit 5).
+    _make_suite(pytester, monkeypatch)
+    result = pytester.runpytest_subprocess("-p", "no:cacheprovider", "-m", "scenario1", "--shard", "2/2")
+    assert result.ret == pytest.ExitCode.OK
+    result.stdout.fnmatch_lines(["*3 deselected*"])
@@ -0,0 +1,129 @@
+import json
+import logging
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.test_data import load_json_from_resources
+
+logger = logging.getLogger(__name__)
+
+# Claves del cache de pytest (`.pytest_cache/`) donde persistimos el historial entre corridas.
+DURATIONS_CACHE_KEY = "e2e/durations"
+FAILED_CACHE_KEY = "e2e/failed"
+
+# Costos medidos en `reports/test.log`: levantar Chrome (~3s) + espera fija de cierre (5s) + quit,
+# y cada nota suma su `delay` más ~1.3s de interacción (tecla, espera de flag y botón "clear").
+FIXED_OVERHEAD_S = 10.0
+PER_NOTE_OVERHEAD_S = 1.3
+DEFAULT_DELAY_S = 1
+
+
+def parse_shard(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Interpreta `--shard i/N` (i en base 1) y devuelve (i, N), o None si no se pidió shard.
+
+    Raises:
+        ValueError: si el formato no es `i/N` o si `i` está fuera de 1..N.
+    """
+    if not value:
+        return None
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", value)
+    if not m:
+        raise ValueError(f"Formato de shard inválido: '{value}' (se espera i/N, p. ej. 1/3)")
+    index, total = int(m.group(1)), int(m.group(2))
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Shard fuera de rango: '{value}' (se requiere 1 <= i <= N)")
+    return index, total
+
+
+def estimate_scenario_duration(filename: str) -> float:
+    """Estima la duración (s) de un escenario nunca ejecutado a partir de su JSON en `resources/`.
+
+    Usa la cantidad de notas y el `delay` del escenario; si el archivo no puede leerse,
+    devuelve solo el overhead fijo para no bloquear la planificación.
+    """
+    try:
+        data = load_json_from_resources(filename)
+    except Exception as e:
+        logger.warning(f"No se pudo estimar la duración de '{filename}': {e}")
+        return FIXED_OVERHEAD_S
+
+    scenario = data.get("scenario", {}) if isinstance(data, dict) else {}
+    notes = scenario.get("notes", []) if isinstance(scenario, dict) else []
+    delay = scenario.get("delay", DEFAULT_DELAY_S) if isinstance(scenario, dict) else DEFAULT_DELAY_S
+    # Tolerancia a forma inesperada: sin lista de notas o con delay no numérico no hay base para estimar.
+    if not isinstance(notes, list) or isinstance(delay, bool) or not isinstance(delay, (int, float)):
+        logger.warning(f"Escenario con forma inesperada en '{filename}'; se usa el overhead fijo")
+        return FIXED_OVERHEAD_S
+    return FIXED_OVERHEAD_S + len(notes) * (delay + PER_NOTE_OVERHEAD_S)
+
+
+def valid_durations(raw: object) -> Dict[str, float]:
+    """Filtra el historial leído del cache y conserva solo duraciones numéricas, finitas y no negativas.
+
+    El cache puede venir editado a mano o combinado entre máquinas de CI; las entradas inválidas
+    se descartan (con log) para que el test vuelva a estimarse en lugar de abortar la sesión.
+    """
+    if not isinstance(raw, dict):
+        if raw:
+            logger.warning(f"Historial de duraciones inválido en el cache: {type(raw).__name__}")
+        return {}
+    durations: Dict[str, float] = {}
+    for nid, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            logger.warning(f"Duración inválida en el cache para '{nid}': {value!r}")
+            continue
+        durations[str(nid)] = float(value)
+    return durations
+
+
+def load_durations_file(path: str) -> Dict[str, float]:
+    """Carga un archivo de duraciones compartido (`{nodeid: segundos}`) para calcular los shards.
+
+    Tiene el mismo formato que `.pytest_cache/v/e2e/durations`, así que puede generarse copiando ese
+    archivo (o combinando los de varias máquinas) una vez por pipeline.
+
+    Raises:
+        FileNotFoundError: si el archivo no existe.
+        json.JSONDecodeError: si el JSON está malformado.
+    """
+    file_path = Path(path)
+    logger.info(f"Cargando duraciones para sharding: {file_path}")
+    if not file_path.exists():
+        raise FileNotFoundError(f"Archivo de duraciones no encontrado: {file_path}")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return valid_durations(json.load(f))
+
+
+def order_by_priority(node_ids: Iterable[str], durations: Dict[str, float], failed: Iterable[str]) -> List[str]:
+    """Ordena: primero los que fallaron en la corrida anterior y, dentro de cada grupo, el más largo primero.
+
+    El orden de colección desempata para que la planificación sea estable entre corridas.
+    """
+    failed_set = set(failed)
+    indexed = list(enumerate(node_ids))
+    indexed.sort(key=lambda p: (p[1] not in failed_set, -durations.get(p[1], 0.0), p[0]))
+    return [nid for _, nid in indexed]
+
+
+def partition_shards(node_ids: Sequence[str], durations: Dict[str, float], total: int) -> List[List[str]]:
+    """Reparte los tests en `total` shards balanceados por duración (LPT: longest processing time first).
+
+    Cada test, del más largo al más corto, va al shard con menor carga acumulada; el orden de
+    `node_ids` y el índice de shard más bajo desempatan. Para que cada máquina de CI calcule
+    exactamente la misma partición, `durations` debe ser idéntico en todas (estimaciones o un
+    archivo compartido, nunca el cache local). Dentro de cada shard se conserva el orden de `node_ids`.
+    """
+    position = {nid: i for i, nid in enumerate(node_ids)}
+    shards: List[List[str]] = [[] for _ in range(total)]
+    loads = [0.0] * total
+    for nid in order_by_priority(node_ids, durations, failed=()):
+        target = min(range(total), key=lambda i: (loads[i], i))
+        shards[target].append(nid)
+        loads[target] += durations.get(nid, 0.0)
+    for shard in shards:
+        shard.sort(key=position.__getitem__)
+    for i, load in enumerate(loads, start=1):
+        logger.info(f"Shard {i}/{total}: {len(shards[i - 1])} tests, ~{load:.0f}s estimados")
+    return shards